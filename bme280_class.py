@@ -1,7 +1,35 @@
-import numpy as np
-from smbus2 import SMBus
+import logging
+import threading
+import time
+from collections import namedtuple
+from smbus2 import SMBus, i2c_msg
 from enum import Enum
 
+log = logging.getLogger(__name__)
+
+# numba is optional, without it the compensation functions run as plain python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+# all sensors share one handle to the I2C bus
+# the lock keeps sensors created from different threads from opening it twice
+_bus = None
+_bus_lock = threading.Lock()
+
+def _get_bus():
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = SMBus(1)
+        return _bus
+
+# oversampling factor for an osrs bit field, 0 when the measurement is skipped
+def _osrs_factor(bits):
+    return 0 if bits == 0 else min(1 << (bits - 1), 16)
+
 class BME280OS(Enum):
     SKIP = 1
     OS1 = 2
@@ -33,10 +61,102 @@ class BME280Filter(Enum):
     COEFF16 = 5
 
 
+# floating point compensation formulas from the datasheet, units as in BME280Reading
+# calibration constants are passed already scaled, see _read_calibration
+# CPU bound, microseconds per call even without numba
+@njit(cache=True)
+def _compensate_T(adc_T, T1_1024, T1_8192, T2, T3):
+    var1 = (adc_T / 16384.0 - T1_1024) * T2
+    var2 = (adc_T / 131072.0 - T1_8192) ** 2 * T3
+    t_fine = var1 + var2
+    return t_fine, t_fine / 5120.0
+
+@njit(cache=True)
+def _compensate_P(adc_P, t_fine, P1, P2, P3, P4_65536, P5, P6, P7, P8, P9):
+    var1 = t_fine / 2.0 - 64000.0
+    var2 = var1 * var1 * P6 / 32768.0
+    var2 = var2 + var1 * P5 * 2.0
+    var2 = var2 / 4.0 + P4_65536
+    var1 = (P3 * var1 * var1 / 524288.0 + P2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * P1
+    if var1 == 0:
+        return 0.0
+
+    p = 1048576.0 - adc_P
+    p = (p - var2 / 4096.0) * 6250.0 / var1
+    var1 = P9 * p * p / 2147483648.0
+    var2 = p * P8 / 32768.0
+    return p + (var1 + var2 + P7) / 16.0
+
+@njit(cache=True)
+def _compensate_H(adc_H, t_fine, H1_524288, H2_65536, H3_67108864, H4_64, H5_16384, H6_67108864):
+    var_H = t_fine - 76800.0
+    var_H = (adc_H - (H4_64 + H5_16384 * var_H)) * (H2_65536 * (1.0 + H6_67108864 * var_H * (1.0 + H3_67108864 * var_H)))
+    var_H = var_H * (1.0 - H1_524288 * var_H)
+    var_H = 0.0 if var_H < 0.0 else var_H
+    var_H = 100.0 if var_H > 100.0 else var_H
+    return var_H
+
+# T in degC, P in Pa, H in %RH
+BME280Reading = namedtuple("BME280Reading", "T P H")
+
+# register bit field values for each of the options above
+_OSRS_BITS = {
+    BME280OS.SKIP: 0b000,
+    BME280OS.OS1: 0b001,
+    BME280OS.OS2: 0b010,
+    BME280OS.OS4: 0b011,
+    BME280OS.OS8: 0b100,
+    BME280OS.OS16: 0b101,
+}
+
+_MODE_BITS = {
+    BME280Mode.SLEEP: 0b00,
+    BME280Mode.FORCED: 0b01,
+    BME280Mode.NORMAL: 0b11,
+}
+
+_STANDBY_BITS = {
+    BME280Standby.STANDBY0_5: 0b000,
+    BME280Standby.STANDBY62_5: 0b001,
+    BME280Standby.STANDBY125: 0b010,
+    BME280Standby.STANDBY250: 0b011,
+    BME280Standby.STANDBY500: 0b100,
+    BME280Standby.STANDBY1000: 0b101,
+    BME280Standby.STANDBY10: 0b110,
+    BME280Standby.STANDBY20: 0b111,
+}
+
+# standby time in ms
+_STANDBY_MS = {
+    BME280Standby.STANDBY0_5: 0.5,
+    BME280Standby.STANDBY62_5: 62.5,
+    BME280Standby.STANDBY125: 125,
+    BME280Standby.STANDBY250: 250,
+    BME280Standby.STANDBY500: 500,
+    BME280Standby.STANDBY1000: 1000,
+    BME280Standby.STANDBY10: 10,
+    BME280Standby.STANDBY20: 20,
+}
+
+_FILTER_BITS = {
+    BME280Filter.COEFFOFF: 0b000,
+    BME280Filter.COEFF2: 0b001,
+    BME280Filter.COEFF4: 0b010,
+    BME280Filter.COEFF8: 0b011,
+    BME280Filter.COEFF16: 0b100,
+}
+
+
+# cost model: every I2C transfer costs far more than the compensation
+# math, so reading the sensor is I2C bound. Speed ups come from fewer
+# transfers (burst reads, cached calibration, background sampling), not
+# from faster math. A new bus read has to justify why it cannot be
+# batched with an existing transfer or served from cached values.
 class BME280:
     def __init__(self, sensorAddress):
         self.sensor_addr =  sensorAddress
-        self.bus = SMBus(1)
+        self.bus = _get_bus()
 
         # chip id number; equals to 0x60
         self.id_addr = 0xD1
@@ -102,11 +222,19 @@ class BME280:
         # 0xFE hum_lsb[7..0] raw humidity measurement bits 7..0
         self.hum_addr = 0xFD
         self.hum_len = 2
-
-        self.dig_temp_addr = 0x88
-        self.dig_temp_len = 6
-        self.dig_press_addr = 0x8E
-        self.dig_press_len = 18
+        # 0xF7..0xFE all raw measurement data (press, temp, hum)
+        self.data_addr = 0xF7
+        self.data_len = 8
+
+        # 0x88..0x8D dig_T1..dig_T3, 0x8E..0x9F dig_P1..dig_P9
+        self.dig_temp_press_addr = 0x88
+        self.dig_temp_press_len = 24
+        # 0xA1 dig_H1
+        self.dig_hum1_addr = 0xA1
+        self.dig_hum1_len = 1
+        # 0xE1..0xE7 dig_H2..dig_H6
+        self.dig_hum2_addr = 0xE1
+        self.dig_hum2_len = 7
 
         self.ctrl_hum_val = 0x00
         self.status_val = 0x00
@@ -116,237 +244,329 @@ class BME280:
         self.temp_val = 0x00
         self.hum_val = 0x00
 
-        self.t_fine = 0
+        # None until temperature has been measured, pressure and humidity
+        # can not be compensated before that
+        self.t_fine = None
+        # sample() measures temperature only on every t_fine_interval-th call
+        # and reuses t_fine in between, temperature changes slowly
+        self.t_fine_interval = 10
+        self._t_counter = 0
 
         self.adc_T = 0
         self.adc_P = 0
         self.adc_H = 0
-        self.T = 0
-        self.P = 0
-        self.H = 0
-    
+        self.T = 0.0
+        self.P = 0.0
+        self.H = 0.0
+
+        # background sampling in normal mode, see start_sampling
+        self._sampler = None
+        self._stop_event = threading.Event()
+        self._reading = BME280Reading(self.T, self.P, self.H)
+        self._sampler_error = None
+
+        self._read_calibration()
+
+    # reads (register, length) blocks, each with a combined i2c_rdwr
+    # transfer of a register address write followed by a read
+    # the Pi's i2c-bcm2835 driver allows only one read message per transfer,
+    # and it has to be the last one, so blocks can not share a transfer
+    # I2C bound, one transfer per block
+    def _read_blocks(self, *blocks):
+        readouts = []
+        for addr, length in blocks:
+            read = i2c_msg.read(self.sensor_addr, length)
+            self.bus.i2c_rdwr(i2c_msg.write(self.sensor_addr, [addr]), read)
+            readouts.append(bytes(read))
+        return readouts
+
+    # calibration parameters are stored in the NVM and never change,
+    # so they are read only once
+    # I2C bound, three transfers at construction
+    def _read_calibration(self):
+        dig_regs, dig_regs_hum1, dig_regs_hum2 = self._read_blocks(
+            (self.dig_temp_press_addr, self.dig_temp_press_len),
+            (self.dig_hum1_addr, self.dig_hum1_len),
+            (self.dig_hum2_addr, self.dig_hum2_len))
+
+        self.dig_T1 = int.from_bytes(dig_regs[0:2], 'little')
+        self.dig_T2 = int.from_bytes(dig_regs[2:4], 'little', signed=True)
+        self.dig_T3 = int.from_bytes(dig_regs[4:6], 'little', signed=True)
+
+        self.dig_P1 = int.from_bytes(dig_regs[6:8], 'little')
+        self.dig_P2 = int.from_bytes(dig_regs[8:10], 'little', signed=True)
+        self.dig_P3 = int.from_bytes(dig_regs[10:12], 'little', signed=True)
+        self.dig_P4 = int.from_bytes(dig_regs[12:14], 'little', signed=True)
+        self.dig_P5 = int.from_bytes(dig_regs[14:16], 'little', signed=True)
+        self.dig_P6 = int.from_bytes(dig_regs[16:18], 'little', signed=True)
+        self.dig_P7 = int.from_bytes(dig_regs[18:20], 'little', signed=True)
+        self.dig_P8 = int.from_bytes(dig_regs[20:22], 'little', signed=True)
+        self.dig_P9 = int.from_bytes(dig_regs[22:24], 'little', signed=True)
+
+        self.dig_H1 = dig_regs_hum1[0]
+        self.dig_H2 = int.from_bytes(dig_regs_hum2[0:2], 'little', signed=True)
+        self.dig_H3 = dig_regs_hum2[2]
+        # dig_H4 and dig_H5 are 12 bit values sharing 0xE5, sign is in 0xE4/0xE6
+        self.dig_H4 = (int.from_bytes(dig_regs_hum2[3:4], 'little', signed=True) << 4) | (dig_regs_hum2[4] & 0b1111)
+        self.dig_H5 = (int.from_bytes(dig_regs_hum2[5:6], 'little', signed=True) << 4) | (dig_regs_hum2[4] >> 4)
+        self.dig_H6 = int.from_bytes(dig_regs_hum2[6:7], 'little', signed=True)
+
+        # scaled constants used by the compensation formulas
+        self._dig_T1_1024 = self.dig_T1 / 1024.0
+        self._dig_T1_8192 = self.dig_T1 / 8192.0
+        self._dig_P4_65536 = self.dig_P4 * 65536.0
+        self._dig_H1_524288 = self.dig_H1 / 524288.0
+        self._dig_H2_65536 = self.dig_H2 / 65536.0
+        self._dig_H3_67108864 = self.dig_H3 / 67108864.0
+        self._dig_H4_64 = self.dig_H4 * 64.0
+        self._dig_H5_16384 = self.dig_H5 / 16384.0
+        self._dig_H6_67108864 = self.dig_H6 / 67108864.0
+
+    # setters only update the cached register values, the sensor is
+    # written by sendCommand
     def setMode(self, mode):
-        if mode == BME280Mode.SLEEP:
-            self.ctrl_meas_val &= ~0 << 2
-        elif mode == BME280Mode.FORCED:
-            self.ctrl_meas_val &= ~0 << 2
-            self.ctrl_meas_val |= 0b01
-        elif mode == BME280Mode.NORMAL:
-            self.ctrl_meas_val &= ~0 << 2
-            self.ctrl_meas_val |= 0b11
-        else:
+        if mode not in _MODE_BITS:
             raise NameError("Invalid sensor mode")
+        self.ctrl_meas_val = (self.ctrl_meas_val & 0b11111100) | _MODE_BITS[mode]
 
     def setOsrsHum(self, osrs):
-        if osrs == BME280OS.SKIP:
-            self.ctrl_hum_val &= ~0 << 3
-            self.ctrl_hum_val |= 0b000
-        elif osrs == BME280OS.OS1:
-            self.ctrl_hum_val &= ~0 << 3
-            self.ctrl_hum_val |= 0b001
-        elif osrs == BME280OS.OS2:
-            self.ctrl_hum_val &= ~0 << 3
-            self.ctrl_hum_val |= 0b010
-        elif osrs == BME280OS.OS4:
-            self.ctrl_hum_val &= ~0 << 3
-            self.ctrl_hum_val |= 0b011
-        elif osrs == BME280OS.OS8:
-            self.ctrl_hum_val &= ~0 << 3
-            self.ctrl_hum_val |= 0b100
-        elif osrs == BME280OS.OS16:
-            self.ctrl_hum_val &= ~0 << 3
-            self.ctrl_hum_val |= 0b101
-        else:
+        if osrs not in _OSRS_BITS:
             raise NameError("Invalid Oversampling value")
+        self.ctrl_hum_val = (self.ctrl_hum_val & 0b11111000) | _OSRS_BITS[osrs]
 
     def setOsrsTemp(self, osrs):
-        if osrs == BME280OS.SKIP:
-            self.ctrl_meas_val &= (~0 << 8) | (0b00011111)
-            self.ctrl_meas_val |= 0b00011111
-        elif osrs == BME280OS.OS1:
-            self.ctrl_meas_val &= (~0 << 8) | (0b00011111)
-            self.ctrl_meas_val |= 0b00111111
-        elif osrs == BME280OS.OS2:
-            self.ctrl_meas_val &= (~0 << 8) | (0b00011111)
-            self.ctrl_meas_val |= 0b01011111
-        elif osrs == BME280OS.OS4:
-            self.ctrl_meas_val &= (~0 << 8) | (0b00011111)
-            self.ctrl_meas_val |= 0b01111111
-        elif osrs == BME280OS.OS8:
-            self.ctrl_meas_val &= (~0 << 8) | (0b00011111)
-            self.ctrl_meas_val |= 0b10011111
-        elif osrs == BME280OS.OS16:
-            self.ctrl_meas_val &= (~0 << 8) | (0b00011111)
-            self.ctrl_meas_val |= 0b10111111
-        else:
+        if osrs not in _OSRS_BITS:
             raise NameError("Invalid Oversampling value")
+        self.ctrl_meas_val = (self.ctrl_meas_val & 0b00011111) | (_OSRS_BITS[osrs] << 5)
 
     def setOsrsPress(self, osrs):
-        if osrs == BME280OS.SKIP:
-            self.ctrl_meas_val &= (~0 << 5) | (0b11100011)
-            self.ctrl_meas_val |= 0b11100011
-        elif osrs == BME280OS.OS1:
-            self.ctrl_meas_val &= (~0 << 5) | (0b11100011)
-            self.ctrl_meas_val |= 0b11100111
-        elif osrs == BME280OS.OS2:
-            self.ctrl_meas_val &= (~0 << 5) | (0b11100011)
-            self.ctrl_meas_val |= 0b11101011
-        elif osrs == BME280OS.OS4:
-            self.ctrl_meas_val &= (~0 << 5) | (0b11100011)
-            self.ctrl_meas_val |= 0b11101111
-        elif osrs == BME280OS.OS8:
-            self.ctrl_meas_val &= (~0 << 5) | (0b11100011)
-            self.ctrl_meas_val |= 0b11110011
-        elif osrs == BME280OS.OS16:
-            self.ctrl_meas_val &= (~0 << 5) | (0b11100011)
-            self.ctrl_meas_val |= 0b11110111
-        else:
+        if osrs not in _OSRS_BITS:
             raise NameError("Invalid Oversampling value")
-            
+        self.ctrl_meas_val = (self.ctrl_meas_val & 0b11100011) | (_OSRS_BITS[osrs] << 2)
+
     def setRate(self, rate):
-        if rate == BME280Standby.STANDBY0_5:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY62_5:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY125:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY250:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY500:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY1000:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY10:
-            self.config_val &= (~0 << 8) | 0b00011111
-        elif rate == BME280Standby.STANDBY20:
-            self.config_val &= (~0 << 8) | 0b00011111
-        else:
+        if rate not in _STANDBY_BITS:
             raise NameError("Invalid Standby rate")
-    
+        self.config_val = (self.config_val & 0b00011111) | (_STANDBY_BITS[rate] << 5)
+
     def setFilterCoeff(self, coeff):
-        if coeff == BME280Filter.COEFFOFF:
-            self.config_val &= (~0 << 5) | 0b11100011
-        elif coeff == BME280Filter.COEFF2:
-            self.config_val &= (~0 << 5) | 0b11100111
-        elif coeff == BME280Filter.COEFF4:
-            self.config_val &= (~0 << 5) | 0b11101011
-        elif coeff == BME280Filter.COEFF8:
-            self.config_val &= (~0 << 5) | 0b11101111
-        elif coeff == BME280Filter.COEFF16:
-            self.config_val &= (~0 << 5) | 0b11110011
-        else:
+        if coeff not in _FILTER_BITS:
             raise NameError("Invalid filter coefficient")
-    
-    def sendCommand(self):
-        self.bus.write_byte_data(self.sensor_addr, self.config_addr, self.config_val)
-        self.bus.write_byte_data(self.sensor_addr, self.ctrl_hum_addr, self.ctrl_hum_val)
-        self.bus.write_byte_data(self.sensor_addr, self.ctrl_meas_addr, self.ctrl_meas_val)
+        self.config_val = (self.config_val & 0b11100011) | (_FILTER_BITS[coeff] << 2)
 
+    # I2C bound, one transfer
+    def sendCommand(self):
+        # the sensor does not auto-increment on writes, a multiple byte write
+        # is a list of register address and data pairs
+        # config goes first, writes to it may be ignored once ctrl_meas leaves
+        # sleep mode; ctrl_hum has to be written before ctrl_meas
+        self.bus.i2c_rdwr(i2c_msg.write(self.sensor_addr, [
+            self.config_addr, self.config_val & 0xFF,
+            self.ctrl_hum_addr, self.ctrl_hum_val & 0xFF,
+            self.ctrl_meas_addr, self.ctrl_meas_val & 0xFF,
+        ]))
+
+    # maximum measurement time in ms for the current oversampling settings
+    def _measurement_time_ms(self):
+        osrs_t = _osrs_factor((self.ctrl_meas_val >> 5) & 0b111)
+        osrs_p = _osrs_factor((self.ctrl_meas_val >> 2) & 0b111)
+        osrs_h = _osrs_factor(self.ctrl_hum_val & 0b111)
+
+        t = 1.25 + 2.3 * osrs_t
+        if osrs_p:
+            t += 2.3 * osrs_p + 0.575
+        if osrs_h:
+            t += 2.4 * osrs_h + 0.575
+        return t
+
+    # waits until the measuring bit of the status register is cleared
+    # raises TimeoutError if the conversion did not finish in twice the maximum time
+    # bound by the conversion time of the sensor, then one transfer per poll
+    # i2c_rdwr carries the device address in every message, so sensors sharing
+    # the bus handle from different threads can not read each other's status
+    def _wait_measurement_done(self):
+        t_max = self._measurement_time_ms() / 1000
+        deadline = time.monotonic() + 2 * t_max
+        time.sleep(t_max / 2)
+        while self._read_blocks((self.status_addr, 1))[0][0] & 0b1000:
+            if time.monotonic() > deadline:
+                raise TimeoutError("BME280 measurement did not finish")
+            time.sleep(0.001)
+
+    # the background sampler owns the sensor and the measurement state
+    # while it runs, direct reads would race it
+    def _check_not_sampling(self):
+        if self._sampler is not None:
+            raise RuntimeError("Background sampling is running, use readout()")
+
+    # I2C bound, one transfer each; readout() gets all three in one transfer
     def readTemp(self):
-        temp_readout = self.bus.read_i2c_block_data(self.sensor_addr, self.temp_addr, self.temp_len)
-        dig_regs_temp = self.bus.read_i2c_block_data(self.sensor_addr, self.dig_temp_addr, self.dig_temp_len)
-
-        dig_T1 = np.uint16((dig_regs_temp[1] << 8) | dig_regs_temp[0])
-        dig_T2 = np.int16((dig_regs_temp[3] << 8) | dig_regs_temp[2])
-        dig_T3 = np.int16((dig_regs_temp[5] << 8) | dig_regs_temp[4])
-
-        temp_xlsb = np.uint8(temp_readout[2])
-        temp_lsb = np.uint8(temp_readout[1])
-        temp_msb = np.uint8(temp_readout[0])
-
-        self.adc_T = np.int32(((temp_msb & 255) << 12) | ((temp_lsb & 255) << 4) | ((temp_xlsb & 0b11110000) >> 4))
-
-        dig_T1 = np.int32(dig_T1)
-        dig_T2 = np.int32(dig_T2)
-        dig_T3 = np.int32(dig_T3)
-        self.adc_T =  np.int32(self.adc_T)
-
-        var1 = np.int32((((self.adc_T>>3) - (dig_T1<<1)) * (dig_T2)) >> 11)
-        var2 = np.int32((((self.adc_T>>4) - dig_T1) * ((self.adc_T>>4) - dig_T1) >> 12) * (dig_T3) >> 14)
-        self.t_fine = np.int32(var1 + var2)
-        self.T = np.int32((self.t_fine * 5 + 128)>>8)
+        self._check_not_sampling()
+        temp_readout, = self._read_blocks((self.temp_addr, self.temp_len))
+        self._compensate_temp(temp_readout)
 
     def readPress(self):
-        press_readout = self.bus.read_i2c_block_data(self.sensor_addr, self.press_addr, self.press_len)
-        dig_regs_press = self.bus.read_i2c_block_data(self.sensor_addr, self.dig_press_addr, self.dig_press_len)
-
-        dig_P1 = np.uint16((dig_regs_press[1] << 8) | dig_regs_press[0])
-        dig_P2 = np.int16((dig_regs_press[3] << 8) | dig_regs_press[2])
-        dig_P3 = np.int16((dig_regs_press[5] << 8) | dig_regs_press[4])
-        dig_P4 = np.int16((dig_regs_press[7] << 8) | dig_regs_press[6])
-        dig_P5 = np.int16((dig_regs_press[9] << 8) | dig_regs_press[8])
-        dig_P6 = np.int16((dig_regs_press[11] << 8) | dig_regs_press[10])
-        dig_P7 = np.int16((dig_regs_press[13] << 8) | dig_regs_press[12])
-        dig_P8 = np.int16((dig_regs_press[15] << 8) | dig_regs_press[14])
-        dig_P9 = np.int16((dig_regs_press[17] << 8) | dig_regs_press[16])
-
-        press_xlsb = np.uint8(press_readout[2])
-        press_lsb = np.uint8(press_readout[1])
-        press_msb = np.uint8(press_readout[0])
-
-        self.adc_P = np.int32(((press_msb & 255) << 12) | ((press_lsb & 255) << 4) | ((press_xlsb & 0b11110000) >> 4))
-        var1 = np.int64(self.t_fine) - 128000
-        var2 = var1 * var1 * np.int64(dig_P6)
-        var2 = var2 + ((var1 * np.int64(dig_P5)) << 17)
-        var2 = var2 + (np.int64(dig_P4) << 35)
-        var1 = ((var1 * var1 * np.int64(dig_P3)) >> 8) + ((var1 * np.int64(dig_P2)) << 12)
-        var1 = ((np.int64(1) << 47) + var1) * (np.int64(dig_P1)) >> 33
-        if var1 == 0:
-            self.P = 0
-            return
-        
-        self.P = np.int64(1048576 - self.adc_P)
-        self.P = (((self.P << 31) - var2) * 3125) / var1
-        var1 = np.int64(dig_P9) * (self.P >> 13) * (self.P >> 13) >> 25
-        var2 = (np.int64(dig_P8) * self.P) >> 19
-        self.P = ((self.P + var1 + var2) >> 8) + (np.int64(dig_P7) << 4)
-        self.P = np.uint32(self.P)
+        self._check_not_sampling()
+        press_readout, = self._read_blocks((self.press_addr, self.press_len))
+        self._compensate_press(press_readout)
 
     def readHum(self):
-        hum_readout = self.bus.read_i2c_block_data(self.sensor_addr, self.hum_addr, self.hum_len)
-        dig_regs_hum1 = self.bus.read_i2c_block_data(self.sensor_addr, 0xA1, 1)
-        dig_regs_hum2 = self.bus.read_i2c_block_data(self.sensor_addr, 0xE1, 7)
-
-        dig_H1 = np.uint8(dig_regs_hum1[0])
-        dig_H2 = np.int16((dig_regs_hum2[1] << 8) | dig_regs_hum2[0])
-        dig_H3 = np.uint8(dig_regs_hum2[2])
-        dig_H4 = np.int16((dig_regs_hum2[3] << 4) | (dig_regs_hum2[4] & 0b1111))
-        dig_H5 = np.int16((dig_regs_hum2[5] << 4) | (dig_regs_hum2[4] >> 4))
-        dig_H6 = np.int8(dig_regs_hum2[6])
-
-        hum_lsb = np.uint8(hum_readout[1])
-        hum_msb = np.uint8(hum_readout[0])
-
-        self.adc_H = np.int32((hum_msb << 8) | (hum_lsb))
-        v_x1_u32r = np.int32(self.t_fine - np.int32(76800))
-        v_x1_u32r = (((((self.adc_H << 14) - ((np.int32(dig_H4)) << 20) - ((np.int32(dig_H5)) * v_x1_u32r)) + (np.int32(16384))) >> 15) * (((((((v_x1_u32r * (np.int32(dig_H6))) >> 10) * (((v_x1_u32r * (np.int32(dig_H3))) >> 11) + (np.int32(32768)))) >> 10) + (np.int32(2097152))) * (np.int32(dig_H2)) + 8192) >> 14))
-        v_x1_u32r = (v_x1_u32r - (((((v_x1_u32r >> 15) * (v_x1_u32r >> 15)) >> 7) * (np.int32(dig_H1))) >> 4))
-        v_x1_u32r = 0 if v_x1_u32r < 0 else v_x1_u32r
-        v_x1_u32r = 419430400 if v_x1_u32r > 419430400 else v_x1_u32r
-        self.H = np.uint32(v_x1_u32r >> 12)
-
+        self._check_not_sampling()
+        hum_readout, = self._read_blocks((self.hum_addr, self.hum_len))
+        self._compensate_hum(hum_readout)
+
+    # CPU bound, see _compensate_T/_compensate_P/_compensate_H
+    def _compensate_temp(self, temp_readout):
+        self.adc_T = (temp_readout[0] << 12) | (temp_readout[1] << 4) | (temp_readout[2] >> 4)
+        self.t_fine, self.T = _compensate_T(self.adc_T, self._dig_T1_1024, self._dig_T1_8192, self.dig_T2, self.dig_T3)
+
+    def _compensate_press(self, press_readout):
+        if self.t_fine is None:
+            raise RuntimeError("Temperature has not been measured yet")
+        self.adc_P = (press_readout[0] << 12) | (press_readout[1] << 4) | (press_readout[2] >> 4)
+        self.P = _compensate_P(self.adc_P, self.t_fine, self.dig_P1, self.dig_P2, self.dig_P3, self._dig_P4_65536,
+                               self.dig_P5, self.dig_P6, self.dig_P7, self.dig_P8, self.dig_P9)
+
+    def _compensate_hum(self, hum_readout):
+        if self.t_fine is None:
+            raise RuntimeError("Temperature has not been measured yet")
+        self.adc_H = (hum_readout[0] << 8) | hum_readout[1]
+        self.H = _compensate_H(self.adc_H, self.t_fine, self._dig_H1_524288, self._dig_H2_65536, self._dig_H3_67108864,
+                               self._dig_H4_64, self._dig_H5_16384, self._dig_H6_67108864)
+
+    # returns the latest reading from the background sampler while it runs,
+    # otherwise reads the data registers
+    # raises RuntimeError, chained to the cause, if the background sampler failed
+    # no I2C traffic while sampling, one transfer otherwise
     def readout(self):
-        self.readTemp()
-        self.readPress()
-        self.readHum()
-
-        return [self.T, self.P, self.H]
+        if self._sampler is not None:
+            if self._sampler_error is not None:
+                raise RuntimeError("BME280 background sampling failed") from self._sampler_error
+            return self._reading
+        return self._read_data()
+
+    # raises if require_temp is set and the temperature came back skipped
+    # I2C bound, one transfer
+    def _read_data(self, require_temp=False):
+        # data registers are contiguous, read all of them in one transaction
+        data_readout, = self._read_blocks((self.data_addr, self.data_len))
+        # skipped measurements read as 0x80000 (0x8000 for humidity),
+        # keep the previous values for those
+        if data_readout[3:6] != b'\x80\x00\x00':
+            self._compensate_temp(data_readout[3:6])
+        elif require_temp:
+            raise RuntimeError("BME280 temperature measurement was skipped")
+        if data_readout[0:3] != b'\x80\x00\x00':
+            self._compensate_press(data_readout[0:3])
+        if data_readout[6:8] != b'\x80\x00':
+            self._compensate_hum(data_readout[6:8])
+
+        return BME280Reading(self.T, self.P, self.H)
 
     def simple_readTemp(self):
+        self._check_not_sampling()
         self.setFilterCoeff(BME280Filter.COEFFOFF)
         self.setOsrsHum(BME280OS.SKIP)
         self.setOsrsPress(BME280OS.OS1)
         self.setOsrsTemp(BME280OS.OS1)
         self.setMode(BME280Mode.FORCED)
         self.sendCommand()
-        self.readout()
-        return [self.T, self.P, self.H]
+        self._wait_measurement_done()
+        return self._read_data()
+
+    # forced mode measurement of pressure and humidity, temperature is measured
+    # only when t_fine is due for an update or has never been measured
+    def sample(self):
+        self._check_not_sampling()
+        measure_temp = self.t_fine is None or self._t_counter == 0
+        if measure_temp:
+            self.setOsrsTemp(BME280OS.OS1)
+        else:
+            self.setOsrsTemp(BME280OS.SKIP)
+
+        self.setFilterCoeff(BME280Filter.COEFFOFF)
+        self.setOsrsHum(BME280OS.OS1)
+        self.setOsrsPress(BME280OS.OS1)
+        self.setMode(BME280Mode.FORCED)
+        self.sendCommand()
+        try:
+            self._wait_measurement_done()
+            reading = self._read_data(require_temp=measure_temp)
+        finally:
+            # do not leave temperature skipped for later measurements,
+            # e.g. start_sampling would never update t_fine
+            self.setOsrsTemp(BME280OS.OS1)
+
+        # advance only once t_fine is updated, a failed temperature
+        # measurement is retried on the next call
+        # an interval below 1 measures temperature every time
+        self._t_counter = 1 if measure_temp else self._t_counter + 1
+        self._t_counter %= max(1, self.t_fine_interval)
+        return reading
+
+    # puts the sensor in normal mode with the given standby time and reads
+    # the data registers from a background thread after every measurement
+    # oversampling and filter settings must be set before calling this
+    def start_sampling(self, rate=BME280Standby.STANDBY62_5):
+        if self._sampler is not None:
+            return
+
+        # config is only written reliably in sleep mode
+        self.setMode(BME280Mode.SLEEP)
+        self.setRate(rate)
+        self.sendCommand()
+        self.setMode(BME280Mode.NORMAL)
+        self.sendCommand()
+
+        # in normal mode the measuring bit is set again after every standby
+        # period, so polling it can miss the end of the first measurement;
+        # it is complete after the maximum measurement time
+        t_measure = self._measurement_time_ms() / 1000
+        period = _STANDBY_MS[rate] / 1000 + t_measure
+        time.sleep(t_measure)
+        try:
+            self._reading = self._read_data()
+        except Exception:
+            # no sampler will run, do not leave the sensor measuring
+            self.setMode(BME280Mode.SLEEP)
+            self.sendCommand()
+            raise
+
+        self._stop_event.clear()
+        self._sampler_error = None
+        self._sampler = threading.Thread(target=self._sample_loop, args=(period,), daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self):
+        if self._sampler is None:
+            return
+
+        self._stop_event.set()
+        self._sampler.join()
+        self._sampler = None
+        self.setMode(BME280Mode.SLEEP)
+        self.sendCommand()
+
+    def _sample_loop(self, period):
+        while not self._stop_event.wait(period):
+            try:
+                # a single reference assignment, readers never see a partial reading
+                self._reading = self._read_data()
+            except Exception as e:
+                # the cached reading is stale from now on, readout() raises
+                log.exception("BME280 background sampling failed")
+                self._sampler_error = e
+                return
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    sensor = BME280(0x76)
+    data = sensor.simple_readTemp()
 
-    
+    log.info("T:%.2f C P:%.2f hPa H:%.2f %%RH", data.T, data.P / 100, data.H)
 
-sensor = BME280(0x76)
-data = sensor.simple_readTemp()
 
-print("T:" + str(float(data[0])/100) + " C")
-print("P:" + str(float(data[1])/256/100) + " hPa")
-print("H:" + str(float(data[2])/1024) + " %RH")
\ No newline at end of file
+if __name__ == '__main__':
+    main()